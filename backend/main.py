@@ -1,11 +1,15 @@
-from fastapi import FastAPI, HTTPException, Depends, status, UploadFile, File, Request, Form
+from fastapi import FastAPI, HTTPException, Depends, status, UploadFile, File, Request, Form, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 from motor.motor_asyncio import AsyncIOMotorClient
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import BaseModel, EmailStr, Field, validator, ValidationError
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from typing import Optional, List
+import asyncio
 from datetime import datetime, timedelta
 from passlib.context import CryptContext
 from slowapi import Limiter, _rate_limit_exceeded_handler
@@ -16,8 +20,22 @@ from dotenv import load_dotenv
 import jwt
 import os
 import logging
+import logging.handlers
+import atexit
+import json
+import queue
+import random
+import time
+import uuid
+from contextvars import ContextVar
 from bson import ObjectId
 from pathlib import Path
+from collections import defaultdict, deque
+from itertools import combinations
+from PIL import Image
+import io
+import re
+import math
 
 # Load environment variables from .env file
 load_dotenv()
@@ -26,19 +44,99 @@ load_dotenv()
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
 DEBUG = os.getenv("DEBUG", "True").lower() == "true"
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))  # fraction of sampled info logs to keep
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
 
-# Configure logging
+# Request context attached to every log record
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+route_var: ContextVar[Optional[str]] = ContextVar("route", default=None)
+
+class RequestContextFilter(logging.Filter):
+    """Attach the current request id and route, and drop sampled-out info records"""
+    def filter(self, record):
+        if getattr(record, "sampled", False) and record.levelno <= logging.INFO and random.random() >= LOG_SAMPLE_RATE:
+            return False
+        record.request_id = request_id_var.get()
+        record.route = route_var.get()
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """Render log records as one JSON object per line"""
+    EXTRA_FIELDS = ("request_id", "route", "method", "status_code", "latency_ms")
+
+    def format(self, record):
+        entry = {
+            "timestamp": datetime.utcfromtimestamp(record.created).isoformat() + "Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for field in self.EXTRA_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full"""
+    dropped = 0
+
+    def prepare(self, record):
+        # The queue is in-process, so records need no pickling; the listener thread formats them
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+class ReportingQueueListener(logging.handlers.QueueListener):
+    """Queue listener that logs how many records the handler dropped since the last report"""
+    reported_drops = 0
+
+    def handle(self, record):
+        super().handle(record)
+        self.report_drops()
+
+    def report_drops(self):
+        dropped = DroppingQueueHandler.dropped
+        if dropped > self.reported_drops:
+            warning = logging.makeLogRecord({
+                "name": __name__,
+                "levelno": logging.WARNING,
+                "levelname": "WARNING",
+                "msg": "Dropped %s log records because the log queue was full",
+                "args": (dropped - self.reported_drops,)
+            })
+            self.reported_drops = dropped
+            super().handle(warning)
+
+    def stop(self):
+        super().stop()
+        self.report_drops()
+
+# Configure logging: handlers on the request path only enqueue records, and a
+# background listener thread formats them and writes to stdout
 log_level = getattr(logging, LOG_LEVEL.upper(), logging.INFO)
-logging.basicConfig(
-    level=log_level,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+queue_handler = DroppingQueueHandler(log_queue)
+queue_handler.addFilter(RequestContextFilter())
+stream_handler = logging.StreamHandler()
+stream_handler.setFormatter(JsonFormatter())
+log_listener = ReportingQueueListener(log_queue, stream_handler, respect_handler_level=True)
+logging.basicConfig(level=log_level, handlers=[queue_handler], force=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+
 logger = logging.getLogger(__name__)
 
 # Log environment info
-logger.info(f"Starting WasteWise API in {ENVIRONMENT} mode")
-logger.info(f"Debug mode: {DEBUG}")
-logger.info(f"Log level: {LOG_LEVEL}")
+logger.info("Starting WasteWise API in %s mode", ENVIRONMENT)
+logger.info("Debug mode: %s", DEBUG)
+logger.info("Log level: %s", LOG_LEVEL)
 
 # Rate limiting
 limiter = Limiter(key_func=get_remote_address)
@@ -57,6 +155,33 @@ app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 app.add_middleware(SlowAPIMiddleware)
 
+# Request Context Middleware
+@app.middleware("http")
+async def log_request_context(request: Request, call_next):
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    request_id_token = request_id_var.set(request_id)
+    route_token = route_var.set(request.url.path)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            route_var.set(route.path)
+        response.headers["X-Request-ID"] = request_id
+        logger.info(
+            "%s %s %s", request.method, request.url.path, response.status_code,
+            extra={
+                "sampled": True,
+                "method": request.method,
+                "status_code": response.status_code,
+                "latency_ms": round((time.perf_counter() - start) * 1000, 2)
+            }
+        )
+        return response
+    finally:
+        route_var.reset(route_token)
+        request_id_var.reset(request_id_token)
+
 # Security Headers Middleware
 @app.middleware("http")
 async def add_security_headers(request, call_next):
@@ -84,16 +209,86 @@ DATABASE_NAME = os.getenv("DATABASE_NAME", "wastewise_db")
 client = AsyncIOMotorClient(MONGODB_URL)
 db = client[DATABASE_NAME]
 
+# Region (tenant) configuration: every user and report belongs to one municipality
+DEFAULT_REGION = os.getenv("DEFAULT_REGION", "default")
+REGIONS = [r.strip() for r in os.getenv("REGIONS", DEFAULT_REGION).split(",") if r.strip()]
+SHARD_REPORTS = os.getenv("SHARD_REPORTS", "False").lower() == "true"
+
 # Collections
 users_collection = db["users"]
 reports_collection = db["reports"]
+report_events_collection = db["report_events"]
+sla_stats_collection = db["sla_stats"]
+
+# Report field projections
+REPORT_FIELDS = [
+    "_id", "user_id", "user_name", "user_email", "image_url", "location",
+    "description", "status", "admin_comment", "timestamp", "image_phash", "duplicate_of",
+    "claimed_by", "claim_expires_at", "area", "status_since", "region"
+]
+REPORT_SUMMARY_FIELDS = ["_id", "user_id", "user_name", "image_url", "location", "status", "timestamp"]
+REPORT_VIEWS = {
+    "summary": REPORT_SUMMARY_FIELDS,
+    "full": None
+}
+
+def build_report_projection(fields: Optional[str] = None, view: Optional[str] = None):
+    """Build a Mongo projection from a comma-separated field list or a named view"""
+    if fields:
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in requested if f not in REPORT_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown report fields: {', '.join(unknown)}"
+            )
+    elif view:
+        if view not in REPORT_VIEWS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"View must be one of: {', '.join(REPORT_VIEWS)}"
+            )
+        requested = REPORT_VIEWS[view]
+    else:
+        requested = None
+
+    if requested is None:
+        return None
+    projection = {f: 1 for f in requested}
+    # _id is always returned so clients can link to the full report
+    projection["_id"] = 1
+    return projection
 
 # Create indexes for better query performance
+# Every report query is scoped to one region, so report indexes are prefixed with it
 async def create_indexes():
     await users_collection.create_index("email", unique=True)
-    await reports_collection.create_index("user_id")
-    await reports_collection.create_index("status")
-    await reports_collection.create_index("timestamp")
+    await reports_collection.create_index([("region", 1), ("user_id", 1), ("status", 1)], name="reports_region_user_status")
+    # Covering indexes for the "summary" view so list queries are answered from the index alone
+    await reports_collection.create_index(
+        [("region", 1), ("user_id", 1), ("timestamp", -1)]
+        + [(f, 1) for f in REPORT_SUMMARY_FIELDS if f not in ("user_id", "timestamp")],
+        name="reports_region_user_summary"
+    )
+    await reports_collection.create_index(
+        [("region", 1), ("timestamp", -1)] + [(f, 1) for f in REPORT_SUMMARY_FIELDS if f != "timestamp"],
+        name="reports_region_all_summary"
+    )
+    # Work queue claims: equality on region and status, then sort on timestamp, then the lease filter
+    await reports_collection.create_index(
+        [("region", 1), ("status", 1), ("timestamp", 1), ("claim_expires_at", 1)],
+        name="reports_region_work_queue"
+    )
+    await report_events_collection.create_index([("report_id", 1), ("timestamp", 1)])
+    await report_events_collection.create_index("sla_pending", sparse=True, name="report_events_sla_pending")
+    await sla_stats_collection.create_index([("region", 1), ("area", 1)])
+
+async def shard_reports_collection():
+    """Shard the reports collection on a region-prefixed key (requires a mongos router)"""
+    shard_key = {"region": 1, "_id": "hashed"}
+    await reports_collection.create_index(list(shard_key.items()), name="reports_region_shard_key")
+    await client.admin.command("enableSharding", DATABASE_NAME)
+    await client.admin.command("shardCollection", f"{DATABASE_NAME}.reports", key=shard_key)
 
 # Security Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
@@ -108,6 +303,17 @@ security = HTTPBearer()
 # Upload directory
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+MAX_IMAGE_SIZE = 10 * 1024 * 1024  # 10MB
+MAX_BATCH_REPORTS = int(os.getenv("MAX_BATCH_REPORTS", "50"))
+RESERVED_AREAS = ("all", "unassigned")  # names of the aggregate SLA sketches
+
+# Admin work queue
+CLAIM_LEASE_MINUTES = int(os.getenv("CLAIM_LEASE_MINUTES", "15"))
+
+# Duplicate detection configuration
+DUPLICATE_HASH_DISTANCE = int(os.getenv("DUPLICATE_HASH_DISTANCE", "6"))  # max Hamming distance between image hashes
+DUPLICATE_WINDOW_HOURS = int(os.getenv("DUPLICATE_WINDOW_HOURS", "72"))
+MAX_HASH_PIXELS = 12_000_000  # larger images are not hashed rather than decoded at full size
 
 # Mount static files for image serving
 app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
@@ -118,6 +324,7 @@ class UserRegister(BaseModel):
     email: EmailStr
     password: str = Field(..., min_length=6)
     role: str = Field(default="user")
+    region: str = Field(default=DEFAULT_REGION)
 
     @validator('role')
     def validate_role(cls, v):
@@ -125,6 +332,12 @@ class UserRegister(BaseModel):
             raise ValueError('Role must be either "user" or "admin"')
         return v
 
+    @validator('region')
+    def validate_region(cls, v):
+        if v not in REGIONS:
+            raise ValueError(f'Region must be one of: {", ".join(REGIONS)}')
+        return v
+
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
@@ -151,6 +364,13 @@ class Token(BaseModel):
 class ReportCreate(BaseModel):
     location: str = Field(..., min_length=3, max_length=200)
     description: str = Field(..., min_length=10, max_length=1000)
+    area: Optional[str] = Field(None, max_length=100)
+
+    @validator('area')
+    def validate_area(cls, v):
+        if v in RESERVED_AREAS:
+            raise ValueError(f'Area cannot be "{v}"')
+        return v
 
 class ReportUpdate(BaseModel):
     status: Optional[str] = None
@@ -220,16 +440,316 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         )
     
     user["_id"] = str(user["_id"])
+    # Accounts created before regions existed belong to the default region
+    user["region"] = user.get("region") or DEFAULT_REGION
     return user
 
+def write_upload(image_path: str, content: bytes):
+    with open(image_path, "wb") as f:
+        f.write(content)
+
+def prepare_upload(content: bytes, image_path: str) -> Optional[int]:
+    """Write an uploaded image to disk and return its perceptual hash"""
+    write_upload(image_path, content)
+    return compute_image_phash(content)
+
+class UploadTooLarge(Exception):
+    pass
+
+def stream_upload(image: UploadFile, image_path: str) -> Optional[int]:
+    """Copy an upload to disk in chunks, enforcing MAX_IMAGE_SIZE, and return its perceptual hash"""
+    size = 0
+    image.file.seek(0)
+    try:
+        with open(image_path, "wb") as f:
+            while chunk := image.file.read(1024 * 1024):
+                size += len(chunk)
+                if size > MAX_IMAGE_SIZE:
+                    raise UploadTooLarge()
+                f.write(chunk)
+    except Exception:
+        if os.path.exists(image_path):
+            os.remove(image_path)
+        raise
+    return compute_image_phash(image_path)
+
+def remove_uploads(image_paths):
+    for image_path in image_paths:
+        if os.path.exists(image_path):
+            os.remove(image_path)
+
+# Status History and SLA Sketches
+SLA_SKETCH_ACCURACY = 0.02  # relative error of percentile estimates
+SLA_SKETCH_GAMMA = (1 + SLA_SKETCH_ACCURACY) / (1 - SLA_SKETCH_ACCURACY)
+
+def sketch_bucket(seconds: float) -> int:
+    """Map a duration to a log-spaced histogram bucket (DDSketch-style)"""
+    return math.ceil(math.log(max(seconds, 1.0), SLA_SKETCH_GAMMA))
+
+def sketch_quantile(buckets: dict, count: int, q: float) -> Optional[float]:
+    """Estimate the q-quantile from a bucket histogram"""
+    if not count:
+        return None
+    rank = q * (count - 1)
+    seen = 0
+    for index in sorted(buckets, key=int):
+        seen += buckets[index]
+        if seen > rank:
+            return round(2 * SLA_SKETCH_GAMMA ** int(index) / (SLA_SKETCH_GAMMA + 1), 1)
+    return None
+
+def summarize_sketch(sketch: dict) -> dict:
+    count = sketch.get("count", 0)
+    buckets = sketch.get("buckets", {})
+    return {
+        "count": count,
+        "mean_seconds": round(sketch["sum"] / count, 1) if count else None,
+        "p50_seconds": sketch_quantile(buckets, count, 0.5),
+        "p90_seconds": sketch_quantile(buckets, count, 0.9),
+        "p99_seconds": sketch_quantile(buckets, count, 0.99)
+    }
+
+def status_event(report: dict, from_status: Optional[str], to_status: str, changed_by: str, now: datetime) -> dict:
+    """Build an append-only status transition event for a report"""
+    event = {
+        "report_id": str(report["_id"]),
+        "from_status": from_status,
+        "to_status": to_status,
+        "changed_by": changed_by,
+        "region": report.get("region") or DEFAULT_REGION,
+        "area": report.get("area"),
+        "timestamp": now
+    }
+    if from_status is not None:
+        entered = report.get("status_since") or report["timestamp"]
+        # A report leaves a given state entered at a given time only once, so replays reuse the same _id
+        event["_id"] = f"{event['report_id']}:{entered.isoformat()}:{to_status}"
+        event["duration_seconds"] = (now - entered).total_seconds()
+        if to_status == "completed":
+            event["time_to_complete_seconds"] = (now - report["timestamp"]).total_seconds()
+        event["sla_pending"] = list(sla_sketch_updates(event))
+    return event
+
+def sla_sketch_updates(event: dict) -> dict:
+    """Map each SLA sketch key a transition event contributes to onto its update"""
+    samples = [("time_in_state", event["from_status"], event["duration_seconds"])]
+    if event.get("time_to_complete_seconds") is not None:
+        samples.append(("time_to_complete", "completed", event["time_to_complete_seconds"]))
+
+    region = event["region"]
+    updates = {}
+    for metric, state, seconds in samples:
+        for area in {"all", event.get("area") or "unassigned"}:
+            updates[f"{region}:{metric}:{state}:{area}"] = {
+                "$set": {"metric": metric, "status": state, "region": region, "area": area},
+                "$inc": {"count": 1, "sum": seconds, f"buckets.{sketch_bucket(seconds)}": 1}
+            }
+    return updates
+
+async def apply_sla_event(event: dict):
+    """Fold a transition event into the SLA sketches, at most once per sketch.
+
+    Each sketch key is claimed by pulling it from the event's sla_pending list
+    before its counters are incremented, and put back if the increment fails so
+    reconcile_sla_sketches can retry it. A crash between the claim and the
+    increment drops that one sample instead of counting it twice.
+    """
+    for key, update in sla_sketch_updates(event).items():
+        claimed = await report_events_collection.update_one(
+            {"_id": event["_id"], "sla_pending": key},
+            {"$pull": {"sla_pending": key}}
+        )
+        if claimed.modified_count == 0:
+            continue
+        try:
+            await sla_stats_collection.update_one({"_id": key}, update, upsert=True)
+        except Exception:
+            await report_events_collection.update_one({"_id": event["_id"]}, {"$addToSet": {"sla_pending": key}})
+            raise
+
+async def record_status_transition(report: dict, from_status: str, to_status: str, changed_by: str, now: datetime):
+    """Log a status transition and fold its durations into the SLA sketches"""
+    event = status_event(report, from_status, to_status, changed_by, now)
+    try:
+        await report_events_collection.insert_one(event)
+    except DuplicateKeyError:
+        pass  # already recorded by an earlier attempt
+    await apply_sla_event(event)
+
+async def reconcile_sla_sketches():
+    """Apply transition events whose SLA sketch update did not complete"""
+    applied = 0
+    async for event in report_events_collection.find({"sla_pending": {"$type": "string"}}):
+        await apply_sla_event(event)
+        applied += 1
+    return applied
+
+# Duplicate Detection
+def compute_image_phash(source) -> Optional[int]:
+    """Compute a 64-bit difference hash (dHash) of image bytes or an image file path, or None if it cannot be decoded"""
+    try:
+        with Image.open(io.BytesIO(source) if isinstance(source, bytes) else source) as img:
+            # JPEGs can be decoded at a reduced scale; the hash only needs a 9x8 thumbnail
+            img.draft("L", (64, 64))
+            width, height = img.size
+            if width * height > MAX_HASH_PIXELS:
+                return None
+            img.thumbnail((64, 64), Image.BILINEAR)
+            pixels = list(img.convert("L").resize((9, 8), Image.LANCZOS).getdata())
+    except Exception:
+        return None
+
+    phash = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            phash = (phash << 1) | (1 if left > right else 0)
+    return phash
+
+def normalize_location(location: str) -> frozenset:
+    """Reduce a free-text location to a set of lowercase words for fuzzy comparison"""
+    return frozenset(re.findall(r"[a-z0-9]+", location.lower()))
+
+def locations_match(a: frozenset, b: frozenset) -> bool:
+    if not a or not b:
+        return False
+    return len(a & b) / len(a | b) >= 0.5
+
+class ImageHashIndex:
+    """In-memory multi-index hash over 64-bit image hashes.
+
+    Each hash is split into four 16-bit chunks with one lookup table per chunk.
+    Two hashes within distance d must agree on at least one chunk to within
+    d // 4 bits, so a search only probes a handful of buckets per chunk instead
+    of scanning every stored hash.
+    """
+    CHUNKS = 4
+    CHUNK_BITS = 16
+
+    def __init__(self, max_distance: int):
+        self.max_distance = max_distance
+        self.tables = [defaultdict(list) for _ in range(self.CHUNKS)]
+        self.entries = {}  # position -> (phash, report_id, timestamp, location_words, region)
+        self.order = deque()  # positions in insertion order, oldest first
+        self.report_ids = set()
+        self.next_position = 0
+        self.loaded_until = None  # timestamp of the newest report loaded from the database
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _chunks(self, phash: int):
+        mask = (1 << self.CHUNK_BITS) - 1
+        return [(phash >> (i * self.CHUNK_BITS)) & mask for i in range(self.CHUNKS)]
+
+    def _probes(self, chunk: int):
+        radius = self.max_distance // self.CHUNKS
+        for r in range(radius + 1):
+            for bits in combinations(range(self.CHUNK_BITS), r):
+                probe = chunk
+                for bit in bits:
+                    probe ^= 1 << bit
+                yield probe
+
+    def add(self, phash: int, report_id: str, timestamp: datetime, location: str, region: str):
+        if report_id in self.report_ids:
+            return
+        position = self.next_position
+        self.next_position += 1
+        self.entries[position] = (phash, report_id, timestamp, normalize_location(location), region)
+        self.order.append(position)
+        self.report_ids.add(report_id)
+        for table, chunk in zip(self.tables, self._chunks(phash)):
+            table[chunk].append(position)
+
+    def prune(self, cutoff: datetime):
+        """Drop entries older than cutoff; they can no longer match inside the duplicate window"""
+        while self.order and self.entries[self.order[0]][2] < cutoff:
+            position = self.order.popleft()
+            phash, report_id = self.entries.pop(position)[:2]
+            self.report_ids.discard(report_id)
+            for table, chunk in zip(self.tables, self._chunks(phash)):
+                bucket = table[chunk]
+                bucket.remove(position)
+                if not bucket:
+                    del table[chunk]
+
+    def search(self, phash: int):
+        """Return (distance, entry) pairs for every stored hash within max_distance"""
+        seen = set()
+        matches = []
+        for table, chunk in zip(self.tables, self._chunks(phash)):
+            for probe in self._probes(chunk):
+                for position in table.get(probe, ()):
+                    if position in seen:
+                        continue
+                    seen.add(position)
+                    entry = self.entries[position]
+                    distance = (entry[0] ^ phash).bit_count()
+                    if distance <= self.max_distance:
+                        matches.append((distance, entry))
+        return matches
+
+    def find_duplicate(self, phash: int, timestamp: datetime, location: str, region: str):
+        """Return (report_id, distance) of the closest likely duplicate in the region, or None"""
+        window = timedelta(hours=DUPLICATE_WINDOW_HOURS)
+        location_words = normalize_location(location)
+        best = None
+        for distance, (_, report_id, entry_timestamp, entry_location, entry_region) in self.search(phash):
+            if entry_region != region:
+                continue
+            if abs(timestamp - entry_timestamp) > window:
+                continue
+            if not locations_match(location_words, entry_location):
+                continue
+            if best is None or distance < best[1]:
+                best = (report_id, distance)
+        return best
+
+image_hash_index = ImageHashIndex(DUPLICATE_HASH_DISTANCE)
+
+IMAGE_HASH_REFRESH_OVERLAP = timedelta(minutes=1)  # ObjectIds from different workers are only roughly ordered
+
+async def load_image_hashes(index: ImageHashIndex, since: datetime):
+    """Add hashes of reports created after since to the index"""
+    cursor = reports_collection.find(
+        {"_id": {"$gt": ObjectId.from_datetime(since)}, "image_phash": {"$ne": None}},
+        {"image_phash": 1, "timestamp": 1, "location": 1, "region": 1}
+    ).sort("_id", 1)
+    async for report in cursor:
+        index.add(
+            int(report["image_phash"], 16), str(report["_id"]), report["timestamp"], report["location"],
+            report.get("region") or DEFAULT_REGION
+        )
+        if index.loaded_until is None or report["timestamp"] > index.loaded_until:
+            index.loaded_until = report["timestamp"]
+
+async def rebuild_image_hash_index():
+    """Load hashes of reports inside the duplicate window into a fresh index"""
+    index = ImageHashIndex(DUPLICATE_HASH_DISTANCE)
+    index.loaded_until = datetime.utcnow() - timedelta(hours=DUPLICATE_WINDOW_HOURS)
+    await load_image_hashes(index, index.loaded_until)
+    return index
+
+async def refresh_image_hash_index():
+    """Pick up reports added by other workers and drop those outside the duplicate window.
+
+    Each gunicorn worker keeps its own index, so this runs before every lookup.
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=DUPLICATE_WINDOW_HOURS)
+    since = max(image_hash_index.loaded_until or cutoff, cutoff + IMAGE_HASH_REFRESH_OVERLAP)
+    await load_image_hashes(image_hash_index, since - IMAGE_HASH_REFRESH_OVERLAP)
+    image_hash_index.prune(cutoff)
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
     logger.info("🚀 Starting WasteWise API...")
     await create_indexes()
     logger.info("✅ Database indexes created")
-    logger.info(f"📊 Database: {DATABASE_NAME}")
-    logger.info(f"🌐 CORS allowed origins: {ALLOWED_ORIGINS}")
+    logger.info("📊 Database: %s", DATABASE_NAME)
+    logger.info("🌐 CORS allowed origins: %s", ALLOWED_ORIGINS)
     logger.info("🔒 Security headers enabled")
     logger.info("⏱️  Rate limiting enabled")
 
@@ -246,7 +766,7 @@ async def health_check(request: Request):
             "timestamp": datetime.utcnow().isoformat()
         }
     except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
+        logger.error("Health check failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Service unhealthy"
@@ -280,11 +800,12 @@ async def register(request: Request, user_data: UserRegister):
             "email": user_data.email,
             "password": hashed_password,
             "role": user_data.role,
+            "region": user_data.region,
             "created_at": datetime.utcnow()
         }
         
         result = await users_collection.insert_one(user)
-        logger.info(f"✅ New {user_data.role} registered: {user_data.email}")
+        logger.info("✅ New %s registered: %s", user_data.role, user_data.email)
         
         # Generate token
         access_token = create_access_token(data={"sub": user_data.email})
@@ -295,13 +816,14 @@ async def register(request: Request, user_data: UserRegister):
                 "id": str(result.inserted_id),
                 "name": user_data.name,
                 "email": user_data.email,
-                "role": user_data.role
+                "role": user_data.role,
+                "region": user_data.region
             }
         }
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Registration error: {str(e)}")
+        logger.error("Registration error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Registration failed"
@@ -329,7 +851,7 @@ async def login(request: Request, credentials: UserLogin):
         
         # Generate token
         access_token = create_access_token(data={"sub": credentials.email})
-        logger.info(f"✅ User logged in: {credentials.email} as {credentials.role}")
+        logger.info("✅ User logged in: %s as %s", credentials.email, credentials.role)
         
         return {
             "token": access_token,
@@ -337,13 +859,14 @@ async def login(request: Request, credentials: UserLogin):
                 "id": str(user["_id"]),
                 "name": user["name"],
                 "email": user["email"],
-                "role": user["role"]
+                "role": user["role"],
+                "region": user.get("region") or DEFAULT_REGION
             }
         }
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Login error: {str(e)}")
+        logger.error("Login error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Login failed"
@@ -359,10 +882,11 @@ async def get_user_profile(current_user: dict = Depends(get_current_user)):
             "name": current_user["name"],
             "email": current_user["email"],
             "role": current_user["role"],
+            "region": current_user["region"],
             "created_at": current_user.get("created_at", "")
         }
     except Exception as e:
-        logger.error(f"Error fetching profile: {str(e)}")
+        logger.error("Error fetching profile: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch profile"
@@ -409,7 +933,7 @@ async def update_user_profile(
         # Get updated user
         updated_user = await users_collection.find_one({"_id": ObjectId(current_user["_id"])})
         
-        logger.info(f"✅ Profile updated for user: {current_user['email']}")
+        logger.info("✅ Profile updated for user: %s", current_user['email'])
         
         return {
             "message": "Profile updated successfully",
@@ -417,13 +941,14 @@ async def update_user_profile(
                 "id": str(updated_user["_id"]),
                 "name": updated_user["name"],
                 "email": updated_user["email"],
-                "role": updated_user["role"]
+                "role": updated_user["role"],
+                "region": updated_user.get("region") or DEFAULT_REGION
             }
         }
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error updating profile: {str(e)}")
+        logger.error("Error updating profile: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to update profile"
@@ -455,13 +980,13 @@ async def update_user_password(
             {"$set": {"password": new_hashed_password}}
         )
         
-        logger.info(f"✅ Password updated for user: {current_user['email']}")
+        logger.info("✅ Password updated for user: %s", current_user['email'])
         
         return {"message": "Password updated successfully"}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error updating password: {str(e)}")
+        logger.error("Error updating password: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to update password"
@@ -474,11 +999,18 @@ async def create_report(
     location: str = Form(..., min_length=3),
     description: str = Form(..., min_length=10),
     image: UploadFile = File(...),
+    area: Optional[str] = Form(None, max_length=100),
     current_user: dict = Depends(get_current_user)
 ):
     """Create a new waste report with image upload"""
     try:
-        logger.info(f"📝 Creating report - Location: {location}, Description length: {len(description)}, Image: {image.filename}")
+        logger.info("📝 Creating report - Location: %s, Description length: %s, Image: %s", location, len(description), image.filename, extra={"sampled": True})
+        
+        if area in RESERVED_AREAS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f'Area cannot be "{area}"'
+            )
         
         # Validate file type
         if not image.content_type.startswith('image/'):
@@ -489,7 +1021,7 @@ async def create_report(
         
         # Validate file size (max 10MB)
         content = await image.read()
-        if len(content) > 10 * 1024 * 1024:
+        if len(content) > MAX_IMAGE_SIZE:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Image size must be less than 10MB"
@@ -500,8 +1032,13 @@ async def create_report(
         image_filename = f"{datetime.utcnow().timestamp()}_{current_user['_id']}{file_extension}"
         image_path = os.path.join(UPLOAD_DIR, image_filename)
         
-        with open(image_path, "wb") as f:
-            f.write(content)
+        # Check for likely duplicates of an existing report
+        now = datetime.utcnow()
+        phash = await run_in_threadpool(prepare_upload, content, image_path)
+        duplicate = None
+        if phash is not None:
+            await refresh_image_hash_index()
+            duplicate = image_hash_index.find_duplicate(phash, now, location, current_user["region"])
         
         # Create report
         report = {
@@ -513,27 +1050,219 @@ async def create_report(
             "description": description,
             "status": "pending",
             "admin_comment": "",
-            "timestamp": datetime.utcnow()
+            "timestamp": now,
+            "status_since": now,
+            "region": current_user["region"],
+            "area": area,
+            "image_phash": f"{phash:016x}" if phash is not None else None,
+            "duplicate_of": duplicate[0] if duplicate else None
         }
         
         result = await reports_collection.insert_one(report)
         report["_id"] = str(result.inserted_id)
+        # The report is committed; a history write failure must not make the client retry and duplicate it
+        try:
+            await report_events_collection.insert_one(status_event(report, None, "pending", current_user["_id"], now))
+        except Exception as e:
+            logger.error("Status event insert error for report %s: %s", report["_id"], e)
+        
+        if phash is not None:
+            image_hash_index.add(phash, report["_id"], now, location, current_user["region"])
+        if duplicate:
+            logger.info("🔁 Report %s flagged as possible duplicate of %s (distance %s)", report['_id'], duplicate[0], duplicate[1])
         
-        logger.info(f"✅ New report created by {current_user['email']}")
+        logger.info("✅ New report created by %s", current_user['email'])
         return report
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Report creation error: {str(e)}")
+        logger.error("Report creation error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to create report"
         )
 
+@app.post("/reports/batch", tags=["Reports"])
+@limiter.limit("10/minute")
+async def create_reports_batch(
+    request: Request,
+    locations: List[str] = Form(...),
+    descriptions: List[str] = Form(...),
+    images: List[UploadFile] = File(...),
+    areas: Optional[List[str]] = Form(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """Create many waste reports in one request (offline sync).
+
+    The i-th location, description and image form one report. Each item
+    succeeds or fails on its own; the response lists a result per item.
+    """
+    try:
+        if not (len(locations) == len(descriptions) == len(images)):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="locations, descriptions and images must have the same length"
+            )
+        if areas is not None and len(areas) != len(images):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="areas must have the same length as images"
+            )
+        if len(images) > MAX_BATCH_REPORTS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Batch may contain at most {MAX_BATCH_REPORTS} reports"
+            )
+        
+        logger.info("📦 Creating batch of %s reports for %s", len(images), current_user['email'])
+        
+        now = datetime.utcnow()
+        results = [None] * len(images)
+        pending = []  # (index, report, image_path, image)
+        
+        # Validate every item up front so one bad item does not fail the batch
+        for i, (location, description, image) in enumerate(zip(locations, descriptions, images)):
+            try:
+                ReportCreate(location=location, description=description, area=areas[i] if areas else None)
+            except ValidationError as e:
+                results[i] = {"index": i, "status": "failed", "error": e.errors()[0]["msg"]}
+                continue
+            if not (image.content_type or "").startswith('image/'):
+                results[i] = {"index": i, "status": "failed", "error": "Uploaded file must be an image"}
+                continue
+            
+            file_extension = Path(image.filename).suffix
+            image_filename = f"{now.timestamp()}_{current_user['_id']}_{i}{file_extension}"
+            report = {
+                "user_id": current_user["_id"],
+                "user_name": current_user["name"],
+                "user_email": current_user["email"],
+                "image_url": f"/uploads/{image_filename}",
+                "location": location,
+                "description": description,
+                "status": "pending",
+                "admin_comment": "",
+                "timestamp": now,
+                "status_since": now,
+                "region": current_user["region"],
+                "area": areas[i] if areas else None
+            }
+            pending.append((i, report, os.path.join(UPLOAD_DIR, image_filename), image))
+        
+        # Stream images to disk and compute hashes concurrently off the event loop
+        outcomes = await asyncio.gather(
+            *(run_in_threadpool(stream_upload, image, image_path) for _, _, image_path, image in pending),
+            return_exceptions=True
+        )
+        written_paths = [
+            image_path for (_, _, image_path, _), outcome in zip(pending, outcomes)
+            if not isinstance(outcome, Exception)
+        ]
+        
+        try:
+            await refresh_image_hash_index()
+        except Exception:
+            remove_uploads(written_paths)
+            raise
+        # Items are checked one at a time against the shared index and the earlier items of this batch
+        batch_index = ImageHashIndex(DUPLICATE_HASH_DISTANCE)
+        documents = []
+        for (i, report, image_path, _), outcome in zip(pending, outcomes):
+            if isinstance(outcome, UploadTooLarge):
+                results[i] = {"index": i, "status": "failed", "error": "Image size must be less than 10MB"}
+                continue
+            if isinstance(outcome, Exception):
+                logger.error("Batch item %s upload error: %s", i, outcome)
+                results[i] = {"index": i, "status": "failed", "error": "Failed to save image"}
+                continue
+            report["_id"] = ObjectId()
+            duplicate = None
+            if outcome is not None:
+                candidates = [
+                    index.find_duplicate(outcome, now, report["location"], current_user["region"])
+                    for index in (image_hash_index, batch_index)
+                ]
+                candidates = [candidate for candidate in candidates if candidate]
+                duplicate = min(candidates, key=lambda candidate: candidate[1]) if candidates else None
+                batch_index.add(outcome, str(report["_id"]), now, report["location"], current_user["region"])
+            report["image_phash"] = f"{outcome:016x}" if outcome is not None else None
+            report["duplicate_of"] = duplicate[0] if duplicate else None
+            documents.append((i, report, image_path, outcome))
+        
+        # Insert all valid reports in one round trip
+        failed_positions = {}
+        if documents:
+            try:
+                await reports_collection.insert_many([report for _, report, _, _ in documents], ordered=False)
+            except BulkWriteError as e:
+                for error in e.details.get("writeErrors", []):
+                    failed_positions[error["index"]] = error.get("errmsg", "Insert failed")
+            except Exception:
+                remove_uploads(written_paths)
+                raise
+        
+        events = []
+        failed_ids = set()
+        for position, (i, report, image_path, phash) in enumerate(documents):
+            if position in failed_positions:
+                logger.error("Batch item %s insert error: %s", i, failed_positions[position])
+                results[i] = {"index": i, "status": "failed", "error": "Failed to create report"}
+                failed_ids.add(str(report["_id"]))
+                remove_uploads([image_path])
+                continue
+            report["_id"] = str(report["_id"])
+            if phash is not None:
+                image_hash_index.add(phash, report["_id"], now, report["location"], current_user["region"])
+            events.append(status_event(report, None, "pending", current_user["_id"], now))
+            results[i] = {"index": i, "status": "created", "report": report}
+        
+        # Unlink duplicates of batch items that were not inserted
+        if failed_ids:
+            try:
+                await reports_collection.update_many(
+                    {"duplicate_of": {"$in": list(failed_ids)}},
+                    {"$set": {"duplicate_of": None}}
+                )
+            except Exception as e:
+                logger.error("Batch duplicate unlink error: %s", e)
+            for result in results:
+                if result["status"] == "created" and result["report"]["duplicate_of"] in failed_ids:
+                    result["report"]["duplicate_of"] = None
+        # Reports are committed at this point; a history write failure must not fail the batch
+        # (the client would retry it and create duplicates)
+        if events:
+            try:
+                await report_events_collection.insert_many(events, ordered=False)
+            except Exception as e:
+                logger.error("Batch status event insert error: %s", e)
+        
+        created = sum(1 for result in results if result["status"] == "created")
+        logger.info("✅ Batch created %s/%s reports for %s", created, len(results), current_user['email'])
+        return {
+            "created": created,
+            "failed": len(results) - created,
+            "results": results
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Batch report creation error: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to create reports"
+        )
+
 @app.get("/reports/user/{user_id}", tags=["Reports"])
-async def get_user_reports(user_id: str, current_user: dict = Depends(get_current_user)):
+async def get_user_reports(
+    user_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+    view: Optional[str] = Query(None, description='Named field set: "summary" or "full"'),
+    current_user: dict = Depends(get_current_user)
+):
     """Get all reports for a specific user"""
     try:
+        projection = build_report_projection(fields, view)
+        
         # Verify user can only access their own reports (unless admin)
         if current_user["_id"] != user_id and current_user["role"] != "admin":
             raise HTTPException(
@@ -542,7 +1271,7 @@ async def get_user_reports(user_id: str, current_user: dict = Depends(get_curren
             )
         
         reports = []
-        async for report in reports_collection.find({"user_id": user_id}).sort("timestamp", -1):
+        async for report in reports_collection.find({"region": current_user["region"], "user_id": user_id}, projection).sort("timestamp", -1):
             report["_id"] = str(report["_id"])
             reports.append(report)
         
@@ -550,14 +1279,18 @@ async def get_user_reports(user_id: str, current_user: dict = Depends(get_curren
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error fetching user reports: {str(e)}")
+        logger.error("Error fetching user reports: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch reports"
         )
 
 @app.get("/reports/all", tags=["Reports"])
-async def get_all_reports(current_user: dict = Depends(get_current_user)):
+async def get_all_reports(
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+    view: Optional[str] = Query(None, description='Named field set: "summary" or "full"'),
+    current_user: dict = Depends(get_current_user)
+):
     """Get all reports (admin only)"""
     try:
         # Only admins can access all reports
@@ -567,8 +1300,10 @@ async def get_all_reports(current_user: dict = Depends(get_current_user)):
                 detail="Admin access required"
             )
         
+        projection = build_report_projection(fields, view)
+        
         reports = []
-        async for report in reports_collection.find().sort("timestamp", -1):
+        async for report in reports_collection.find({"region": current_user["region"]}, projection).sort("timestamp", -1):
             report["_id"] = str(report["_id"])
             reports.append(report)
         
@@ -576,7 +1311,7 @@ async def get_all_reports(current_user: dict = Depends(get_current_user)):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error fetching all reports: {str(e)}")
+        logger.error("Error fetching all reports: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch reports"
@@ -603,6 +1338,9 @@ async def update_report(
         update_fields = {}
         if update_data.status:
             update_fields["status"] = update_data.status
+            # Changing status finishes any work queue claim on the report
+            update_fields["claimed_by"] = None
+            update_fields["claim_expires_at"] = None
         if update_data.admin_comment is not None:
             update_fields["admin_comment"] = update_data.admin_comment
         
@@ -619,53 +1357,210 @@ async def update_report(
                 detail="Invalid report ID"
             )
         
-        result = await reports_collection.update_one(
-            {"_id": ObjectId(report_id)},
-            {"$set": update_fields}
+        # Update in one round trip, resetting status_since only when the status actually changes
+        now = datetime.utcnow()
+        pipeline_fields = {field: {"$literal": value} for field, value in update_fields.items()}
+        if update_data.status:
+            pipeline_fields["status_since"] = {
+                "$cond": [{"$eq": ["$status", update_data.status]}, "$status_since", now]
+            }
+        previous_report = await reports_collection.find_one_and_update(
+            {"_id": ObjectId(report_id), "region": current_user["region"]},
+            [{"$set": pipeline_fields}],
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.matched_count == 0:
+        if previous_report is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Report not found"
             )
         
-        # Get updated report
-        updated_report = await reports_collection.find_one({"_id": ObjectId(report_id)})
+        updated_report = {**previous_report, **update_fields}
         updated_report["_id"] = str(updated_report["_id"])
         
-        logger.info(f"✅ Report {report_id} updated by admin {current_user['email']}")
+        # Record the status transition for history and SLA analytics
+        if update_data.status and previous_report["status"] != update_data.status:
+            updated_report["status_since"] = now
+            # The update is already committed, so a failure here is logged for replay, not returned
+            try:
+                await record_status_transition(
+                    previous_report, previous_report["status"], update_data.status, current_user["_id"], now
+                )
+            except Exception as e:
+                event = status_event(previous_report, previous_report["status"], update_data.status, current_user["_id"], now)
+                logger.error("Failed to record status transition %s: %s", json.dumps(event, default=str), e)
+        
+        logger.info("✅ Report %s updated by admin %s", report_id, current_user['email'])
         return updated_report
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error updating report: {str(e)}")
+        logger.error("Error updating report: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to update report"
         )
 
+# Admin Work Queue Endpoints
+@app.post("/reports/queue/claim", tags=["Work Queue"])
+@limiter.limit("60/minute")
+async def claim_next_report(request: Request, current_user: dict = Depends(get_current_user)):
+    """Claim the oldest unclaimed pending report (admin only)"""
+    try:
+        if current_user["role"] != "admin":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Admin access required"
+            )
+        
+        now = datetime.utcnow()
+        # Unclaimed reports have no lease; expired leases are released implicitly
+        report = await reports_collection.find_one_and_update(
+            {
+                "region": current_user["region"],
+                "status": "pending",
+                "$or": [
+                    {"claim_expires_at": None},
+                    {"claim_expires_at": {"$lte": now}}
+                ]
+            },
+            {"$set": {
+                "claimed_by": current_user["_id"],
+                "claim_expires_at": now + timedelta(minutes=CLAIM_LEASE_MINUTES)
+            }},
+            sort=[("timestamp", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        
+        if report is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No pending reports available"
+            )
+        
+        report["_id"] = str(report["_id"])
+        logger.info("📥 Report %s claimed by admin %s", report['_id'], current_user['email'])
+        return report
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error claiming report: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to claim report"
+        )
+
+@app.post("/reports/queue/{report_id}/renew", tags=["Work Queue"])
+@limiter.limit("60/minute")
+async def renew_report_claim(request: Request, report_id: str, current_user: dict = Depends(get_current_user)):
+    """Extend the lease on a report claimed by the current admin"""
+    try:
+        if current_user["role"] != "admin":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Admin access required"
+            )
+        
+        if not ObjectId.is_valid(report_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid report ID"
+            )
+        
+        now = datetime.utcnow()
+        report = await reports_collection.find_one_and_update(
+            {
+                "_id": ObjectId(report_id),
+                "region": current_user["region"],
+                "claimed_by": current_user["_id"],
+                "claim_expires_at": {"$gt": now}
+            },
+            {"$set": {"claim_expires_at": now + timedelta(minutes=CLAIM_LEASE_MINUTES)}},
+            return_document=ReturnDocument.AFTER
+        )
+        
+        if report is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Report is not claimed by you or the claim has expired"
+            )
+        
+        report["_id"] = str(report["_id"])
+        return report
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error renewing claim: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to renew claim"
+        )
+
+@app.post("/reports/queue/{report_id}/release", tags=["Work Queue"])
+@limiter.limit("60/minute")
+async def release_report_claim(request: Request, report_id: str, current_user: dict = Depends(get_current_user)):
+    """Return a claimed report to the queue without changing its status"""
+    try:
+        if current_user["role"] != "admin":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Admin access required"
+            )
+        
+        if not ObjectId.is_valid(report_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid report ID"
+            )
+        
+        result = await reports_collection.update_one(
+            {"_id": ObjectId(report_id), "region": current_user["region"], "claimed_by": current_user["_id"]},
+            {"$set": {"claimed_by": None, "claim_expires_at": None}}
+        )
+        
+        if result.matched_count == 0:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Report is not claimed by you"
+            )
+        
+        logger.info("📤 Report %s released by admin %s", report_id, current_user['email'])
+        return {"message": "Claim released successfully"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error releasing claim: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to release claim"
+        )
+
 @app.get("/reports/stats", tags=["Reports"])
 async def get_report_stats(current_user: dict = Depends(get_current_user)):
     """Get statistics about reports"""
     try:
         # Get counts for each status
-        pending = await reports_collection.count_documents({"status": "pending"})
-        in_progress = await reports_collection.count_documents({"status": "in_progress"})
-        completed = await reports_collection.count_documents({"status": "completed"})
+        region = current_user["region"]
+        pending = await reports_collection.count_documents({"region": region, "status": "pending"})
+        in_progress = await reports_collection.count_documents({"region": region, "status": "in_progress"})
+        completed = await reports_collection.count_documents({"region": region, "status": "completed"})
         
         # Get user-specific stats if not admin
         user_stats = {}
         if current_user["role"] == "user":
             user_pending = await reports_collection.count_documents({
+                "region": region,
                 "user_id": current_user["_id"],
                 "status": "pending"
             })
             user_in_progress = await reports_collection.count_documents({
+                "region": region,
                 "user_id": current_user["_id"],
                 "status": "in_progress"
             })
             user_completed = await reports_collection.count_documents({
+                "region": region,
                 "user_id": current_user["_id"],
                 "status": "completed"
             })
@@ -684,12 +1579,92 @@ async def get_report_stats(current_user: dict = Depends(get_current_user)):
             **user_stats
         }
     except Exception as e:
-        logger.error(f"Error fetching stats: {str(e)}")
+        logger.error("Error fetching stats: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch statistics"
         )
 
+@app.get("/reports/analytics/sla", tags=["Reports"])
+async def get_sla_analytics(
+    area: Optional[str] = Query(None, description="Area to report on; all areas when omitted"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get time-in-state and time-to-complete percentiles (admin only)"""
+    try:
+        if current_user["role"] != "admin":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Admin access required"
+            )
+        
+        # Sketches are maintained incrementally on every transition, so this reads a handful of documents
+        area_key = area or "all"
+        time_in_state = {}
+        time_to_complete = summarize_sketch({})
+        async for sketch in sla_stats_collection.find({"region": current_user["region"], "area": area_key}):
+            if sketch["metric"] == "time_in_state":
+                time_in_state[sketch["status"]] = summarize_sketch(sketch)
+            elif sketch["metric"] == "time_to_complete":
+                time_to_complete = summarize_sketch(sketch)
+        
+        return {
+            "region": current_user["region"],
+            "area": area_key,
+            "time_in_state": time_in_state,
+            "time_to_complete": time_to_complete
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error fetching SLA analytics: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch SLA analytics"
+        )
+
+@app.get("/reports/{report_id}/history", tags=["Reports"])
+async def get_report_history(report_id: str, current_user: dict = Depends(get_current_user)):
+    """Get the status transition history of a report"""
+    try:
+        if not ObjectId.is_valid(report_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid report ID"
+            )
+        
+        report = await reports_collection.find_one(
+            {"_id": ObjectId(report_id), "region": current_user["region"]},
+            {"user_id": 1}
+        )
+        if report is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Report not found"
+            )
+        
+        # Users can only see the history of their own reports (unless admin)
+        if current_user["_id"] != report["user_id"] and current_user["role"] != "admin":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to access this report"
+            )
+        
+        events = []
+        async for event in report_events_collection.find({"report_id": report_id}, {"sla_pending": 0}).sort("timestamp", 1):
+            event["_id"] = str(event["_id"])
+            events.append(event)
+        
+        return events
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error fetching report history: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch report history"
+        )
+
 # Health Check Endpoint
 @app.get("/health")
 async def health_check():
@@ -704,7 +1679,7 @@ async def health_check():
             "database": "connected"
         }
     except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
+        logger.error("Health check failed: %s", e)
         return {
             "status": "unhealthy",
             "environment": ENVIRONMENT,
@@ -728,12 +1703,24 @@ async def root():
 @app.on_event("startup")
 async def startup_event():
     """Initialize database indexes and perform startup tasks"""
+    global image_hash_index
     try:
         await create_indexes()
         logger.info("Database indexes created successfully")
+        if SHARD_REPORTS:
+            try:
+                await shard_reports_collection()
+                logger.info("Reports collection sharded on region")
+            except Exception as e:
+                logger.warning("Could not shard reports collection: %s", e)
+        reconciled = await reconcile_sla_sketches()
+        if reconciled:
+            logger.info("Applied %s pending status transitions to SLA sketches", reconciled)
+        image_hash_index = await rebuild_image_hash_index()
+        logger.info("Image hash index loaded with %s entries", len(image_hash_index))
         logger.info("WasteWise API startup completed successfully")
     except Exception as e:
-        logger.error(f"Startup error: {str(e)}")
+        logger.error("Startup error: %s", e)
 
 if __name__ == "__main__":
     import uvicorn
@@ -743,5 +1730,6 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=port,
         log_level="info",
-        access_log=True
+        # Requests are logged through the queue by log_request_context
+        access_log=False
     )
\ No newline at end of file
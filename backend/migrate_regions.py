@@ -0,0 +1,75 @@
+"""
+Assign a region to users and reports created before regions existed
+Run this script once after upgrading a deployment that predates regions.
+Records without a region are moved into DEFAULT_REGION, and the report
+indexes that predate regions are dropped.
+"""
+import asyncio
+import os
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import OperationFailure
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# MongoDB Configuration
+MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "wastewise_db")
+DEFAULT_REGION = os.getenv("DEFAULT_REGION", "default")
+
+# Single-field report indexes replaced by the region-prefixed ones
+LEGACY_REPORT_INDEXES = ["user_id_1", "status_1", "timestamp_1"]
+
+async def migrate_regions():
+    """Backfill the region field on users, reports, events and SLA sketches"""
+    client = AsyncIOMotorClient(MONGODB_URL)
+    try:
+        db = client[DATABASE_NAME]
+        missing_region = {"region": {"$exists": False}}
+        
+        for name in ("users", "reports", "report_events"):
+            result = await db[name].update_many(missing_region, {"$set": {"region": DEFAULT_REGION}})
+            print(f"✅ {name}: assigned {result.modified_count} documents to '{DEFAULT_REGION}'")
+        
+        # SLA sketches are keyed by region; merge the old ones into any region-keyed
+        # sketch the upgraded API has already started
+        sla_stats_collection = db["sla_stats"]
+        merged = 0
+        async for sketch in sla_stats_collection.find(missing_region):
+            increments = {"count": sketch.get("count", 0), "sum": sketch.get("sum", 0)}
+            for index, count in sketch.get("buckets", {}).items():
+                increments[f"buckets.{index}"] = count
+            await sla_stats_collection.update_one(
+                {"_id": f"{DEFAULT_REGION}:{sketch['_id']}"},
+                {
+                    "$set": {
+                        "metric": sketch["metric"],
+                        "status": sketch["status"],
+                        "region": DEFAULT_REGION,
+                        "area": sketch["area"]
+                    },
+                    "$inc": increments
+                },
+                upsert=True
+            )
+            await sla_stats_collection.delete_one({"_id": sketch["_id"]})
+            merged += 1
+        print(f"✅ sla_stats: merged {merged} sketches")
+        
+        reports_collection = db["reports"]
+        for index_name in LEGACY_REPORT_INDEXES:
+            try:
+                await reports_collection.drop_index(index_name)
+                print(f"✅ reports: dropped legacy index {index_name}")
+            except OperationFailure:
+                pass  # already dropped
+        
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    print(f"🔧 Migrating records to region '{DEFAULT_REGION}'...")
+    asyncio.run(migrate_regions())
@@ -0,0 +1,61 @@
+"""
+Backfill perceptual image hashes for existing reports
+Run this script offline to hash uploads that predate duplicate detection.
+The API loads the stored hashes into its in-memory index at startup.
+"""
+import asyncio
+import os
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+from main import compute_image_phash, UPLOAD_DIR
+
+# Load environment variables
+load_dotenv()
+
+# MongoDB Configuration
+MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
+DATABASE_NAME = os.getenv("DATABASE_NAME", "wastewise_db")
+
+async def rebuild_image_hashes():
+    """Compute and store image hashes for reports that are missing one"""
+    client = AsyncIOMotorClient(MONGODB_URL)
+    try:
+        reports_collection = client[DATABASE_NAME]["reports"]
+        hashed = 0
+        missing = 0
+        
+        cursor = reports_collection.find(
+            {"image_phash": {"$exists": False}},
+            {"image_url": 1}
+        )
+        async for report in cursor:
+            image_path = os.path.join(UPLOAD_DIR, os.path.basename(report["image_url"]))
+            if not os.path.exists(image_path):
+                missing += 1
+                continue
+            
+            with open(image_path, "rb") as f:
+                phash = compute_image_phash(f.read())
+            
+            await reports_collection.update_one(
+                {"_id": report["_id"]},
+                {"$set": {
+                    "image_phash": f"{phash:016x}" if phash is not None else None,
+                    "duplicate_of": None
+                }}
+            )
+            hashed += 1
+        
+        print(f"✅ Hashed {hashed} report images")
+        if missing:
+            print(f"⚠️  {missing} reports reference images missing from {UPLOAD_DIR}/")
+        
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    print("🔧 Rebuilding image hashes...")
+    asyncio.run(rebuild_image_hashes())
@@ -15,6 +15,7 @@ load_dotenv()
 # MongoDB Configuration
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "wastewise_db")
+DEFAULT_REGION = os.getenv("DEFAULT_REGION", "default")
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -40,6 +41,7 @@ async def seed_admin():
             "email": "admin@wastewise.com",
             "password": pwd_context.hash("admin123"),
             "role": "admin",
+            "region": DEFAULT_REGION,
             "created_at": datetime.utcnow()
         }
         
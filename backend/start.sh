@@ -29,7 +29,6 @@ if [ "$ENVIRONMENT" = "production" ]; then
         --workers 4 \
         --worker-class uvicorn.workers.UvicornWorker \
         --bind 0.0.0.0:${PORT:-8000} \
-        --access-logfile - \
         --error-logfile - \
         --log-level info
 else
@@ -37,5 +36,6 @@ else
     exec uvicorn main:app \
         --host 0.0.0.0 \
         --port ${PORT:-8000} \
+        --no-access-log \
         --log-level info
 fi
\ No newline at end of file